@@ -0,0 +1,36 @@
+# Moves completed production orders past the archive cutoff into PRODUCTION_ORDER_ARCHIVE.
+#
+#   python archive_orders.py                 archive with ARCHIVE_AFTER_DAYS / ARCHIVE_BATCH_SIZE from .env
+#   python archive_orders.py --dry-run       print tier sizes and how many orders are due to move
+#   python archive_orders.py --days 365 --batch 500 --max-batches 10
+#
+# Each batch commits on its own, so the run can be interrupted and started again at any point. Reads only
+# look at the archive with ARCHIVE_ENABLED=1, so the script refuses to run without it.
+import argparse
+import sys
+from mysql.connector import Error
+
+from app import ARCHIVE_CONFIG, archive_completed_orders, archive_status
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archive completed production orders')
+    parser.add_argument('--days', type=int, default=ARCHIVE_CONFIG['older_than_days'], help='minimum age by Due_date')
+    parser.add_argument('--batch', type=int, default=ARCHIVE_CONFIG['batch_size'], help='orders per transaction')
+    parser.add_argument('--max-batches', type=int, default=None, help='stop after this many batches')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    if not ARCHIVE_CONFIG['enabled']:
+        print('Archiving is disabled; set ARCHIVE_ENABLED=1 so the API reads archived orders too')
+        sys.exit(1)
+    try:
+        if args.dry_run:
+            status = archive_status(args.days)
+            print(f"cutoff {status['cutoff']}: {status.get('eligible', 0)} eligible, "
+                  f"{status.get('hot', 0)} hot, {status.get('archived', 0)} archived")
+            sys.exit(0)
+        result = archive_completed_orders(args.days, args.batch, args.max_batches)
+    except Error as e:
+        print(f'Archive Error: {e}')
+        sys.exit(2)
+    print(f"Archived {result['moved']} order(s) due before {result['cutoff']} in {result['batches']} batch(es), "
+          f"{result['elapsed_ms'] / 1000:.1f}s")
@@ -0,0 +1,438 @@
+# ASGI entry point: hot read routes run natively on an async MySQL pool, everything else is
+# served by the Flask app through a WSGI bridge, so the /api/* contract is identical.
+#
+#   python serve.py                         multi-worker launcher (gunicorn + uvicorn workers)
+#   uvicorn asgi:application --port 5000    single worker
+#
+# Needs the packages in requirements-async.txt.
+import asyncio
+import contextvars
+import os
+import time
+from urllib.parse import parse_qsl
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+from werkzeug.datastructures import MIMEAccept, MultiDict
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app import (app, pool, metrics, response_cache, table_versions, out_of_band_markers, cache_key, etag_for, coded_etag, etag_match,
+                 build_list_query, list_page, columnar_requested, compress_body, normalize_sql, RequestParamError, ENTITIES, DB_CONFIG, POOL_CONFIG, CACHE_CONFIG,
+                 ETAG_CONFIG, METRICS_CONFIG, STREAM_MIMETYPES, STATS_TTL, STATS_TABLES, counts_cache,
+                 NESTED_QUERY, AGGREGATE_QUERY, EVENTS_CONFIG, FeedFull, change_feed, parse_since,
+                 event_stream_preamble, replicas, replica_config, REPLICA_CONFIG, needs_primary,
+                 ADMISSION_CONFIG, QUERY_TIMEOUT_ERRNOS, ServiceOverloaded, QueryTimeout, breaker, route_class, with_time_limit,
+                 ANALYTICS_CONFIG, snapshot_above_average, snapshot_order_count, ARCHIVE_CONFIG, archived_requested,
+                 ensure_archive_table)
+
+ASGI_CONFIG = {
+    'pool_min': int(os.getenv('ASGI_DB_POOL_MIN', POOL_CONFIG['min_size'])),
+    'pool_max': int(os.getenv('ASGI_DB_POOL_MAX', 50)),
+    # Threads the WSGI bridge uses for routes that fall through to Flask
+    'wsgi_threads': int(os.getenv('ASGI_WSGI_THREADS', 10))
+}
+
+class AsyncDB:
+    def __init__(self):
+        self.pool = None
+        self.replicas = []  # aligned with app.replicas.replicas, whose monitor decides which are healthy
+
+    @staticmethod
+    async def _create(config, minsize):
+        # autocommit so a reused connection never reads from a stale REPEATABLE READ snapshot
+        return await aiomysql.create_pool(
+            host=config['host'], port=config['port'], user=config['user'],
+            password=config['password'], db=config['database'],
+            minsize=minsize, maxsize=ASGI_CONFIG['pool_max'],
+            pool_recycle=int(POOL_CONFIG['max_lifetime']), autocommit=True,
+            connect_timeout=config['connection_timeout'])
+
+    async def open(self):
+        self.pool = await self._create(DB_CONFIG, ASGI_CONFIG['pool_min'])
+        # minsize 0 so a replica that is down at startup does not stop the worker
+        self.replicas = [await self._create(replica_config(dsn), 0) for dsn in REPLICA_CONFIG['dsns']]
+
+    async def close(self):
+        for target in [self.pool] + self.replicas:
+            if target is not None:
+                target.close()
+                await target.wait_closed()
+        self.pool, self.replicas = None, []
+
+    def _pick(self, primary):
+        if primary or not self.replicas:
+            return self.pool
+        healthy = [p for p, r in zip(self.replicas, replicas.replicas) if r['healthy']]
+        if not healthy:
+            return self.pool
+        return min(healthy, key=lambda p: (p.size - p.freesize) / p.maxsize)
+
+    async def query(self, sql, params=None, columnar=False, primary=True):
+        # Mirrors execute_query (or execute_rows when columnar): errors are logged and reported as None.
+        # primary=False allows a replica; a failing replica falls back to the primary.
+        target = self._pick(primary)
+        if target is not self.pool:
+            try:
+                return await self._query(target, sql, params, columnar, raise_errors=True)
+            except QueryTimeout:
+                raise
+            except Exception as e:
+                print(f'Replica Query Error: {e}')
+        return await self._query(self.pool, sql, params, columnar)
+
+    async def _acquire(self, target):
+        # Bounded like ConnectionPool.acquire; primary checkouts share the Flask side's circuit breaker
+        guarded = target is self.pool
+        if guarded and not breaker.allow():
+            raise ServiceOverloaded('Database unavailable', breaker.retry_after())
+        try:
+            conn = await asyncio.wait_for(target.acquire(), POOL_CONFIG['timeout'])
+        except asyncio.TimeoutError:
+            # Pool saturated, not the database down; same as PoolTimeout on the Flask side
+            raise
+        except Exception:
+            if guarded:
+                breaker.failure()
+            raise
+        if guarded:
+            breaker.success()
+        return conn
+
+    async def _query(self, target, sql, params, columnar, raise_errors=False):
+        started = time.perf_counter()
+        sql = with_time_limit(sql, route_class_var.get())
+        try:
+            conn = await self._acquire(target)
+            try:
+                if METRICS_CONFIG['enabled']:
+                    metrics.observe_checkout(time.perf_counter() - started)
+                async with conn.cursor(aiomysql.Cursor if columnar else aiomysql.DictCursor) as cursor:
+                    key, started = normalize_sql(sql), time.perf_counter()
+                    try:
+                        await cursor.execute(sql, params)
+                        rows = await cursor.fetchall()
+                    except Exception as e:
+                        if METRICS_CONFIG['enabled']:
+                            metrics.observe_statement(key, time.perf_counter() - started, error=True)
+                        if e.args and e.args[0] in QUERY_TIMEOUT_ERRNOS:
+                            raise QueryTimeout('Query exceeded its time limit', ADMISSION_CONFIG['retry_after']) from e
+                        raise
+                    elapsed = time.perf_counter() - started
+                    if METRICS_CONFIG['enabled']:
+                        metrics.observe_statement(key, elapsed)
+                        metrics.add_rows(key, len(rows))
+                        if elapsed * 1000 >= METRICS_CONFIG['slow_query_ms']:
+                            metrics.log_slow(key, sql, params, elapsed)
+                    if columnar:
+                        return [d[0] for d in cursor.description], list(rows)
+                    return list(rows)
+            finally:
+                target.release(conn)
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f'Query Error: {e}')
+            return None
+
+class AsyncAdmission:
+    # AdmissionControl for the native routes: a queued request is a suspended coroutine, not a blocked thread
+    def __init__(self, limits, queue_timeout=0.05):
+        self.queue_timeout = queue_timeout
+        self._slots = {name: asyncio.Semaphore(limit) for name, limit in limits.items()}
+        self._stats = {name: {'limit': limit, 'in_flight': 0, 'admitted': 0, 'shed': 0} for name, limit in limits.items()}
+
+    async def enter(self, name):
+        try:
+            await asyncio.wait_for(self._slots[name].acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats[name]['shed'] += 1
+            return False
+        self._stats[name]['admitted'] += 1
+        self._stats[name]['in_flight'] += 1
+        return True
+
+    def leave(self, name):
+        self._stats[name]['in_flight'] -= 1
+        self._slots[name].release()
+
+    def stats(self):
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+db = AsyncDB()
+native_admission = AsyncAdmission(ADMISSION_CONFIG['limits'], ADMISSION_CONFIG['queue_timeout'])
+# Route class of the request being served, for the per-class statement time limit
+route_class_var = contextvars.ContextVar('route_class', default=None)
+
+class Request:
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        self.client = self.headers.get('x-client-id') or (scope.get('client') or ('',))[0]
+        self.primary = True
+
+    def wants_stream(self):
+        # Same negotiation as stream_format(); streamed exports stay on the Flask side
+        if self.args.get('format') in STREAM_MIMETYPES:
+            return True
+        accept = parse_accept_header(self.headers.get('accept'), MIMEAccept)
+        return accept.best_match(['application/json', 'application/x-ndjson', 'text/csv']) in ('application/x-ndjson', 'text/csv')
+
+def json_body(obj):
+    return (app.json.dumps(obj) + '\n').encode()
+
+# Native handlers return (status, JSON payload, extra headers)
+async def list_route(req, entity):
+    try:
+        sql, params, page = build_list_query(entity, req.args)
+        columnar = columnar_requested(req.args)
+    except RequestParamError as e:
+        return 400, {'error': str(e)}, []
+    result = await db.query(sql, params, columnar=columnar, primary=req.primary)
+    if result is None and archived_requested(req.args):
+        return 500, {'error': 'Archive query failed'}, []
+    if columnar:
+        columns, rows = result or ([], [])
+        body, headers = list_page(rows, page, columns)
+    else:
+        body, headers = list_page(result or [], page)
+    return 200, body, headers
+
+async def get_route(req, entity, key):
+    sql = ENTITIES[entity]['sql']
+    result = await db.query(sql['select_one'], (key,), primary=req.primary)
+    if result is not None and not result and 'select_archived' in sql and ARCHIVE_CONFIG['enabled']:
+        result = await db.query(sql['select_archived'], (key,), primary=req.primary)
+    if result is None:
+        return 500, {'message': 'Database connection failed'}, []
+    return (200, result[0], []) if result else (404, {}, [])
+
+_stats_refresh = asyncio.Lock()
+
+async def stats_route(req):
+    # Each COUNT runs on its own pooled connection, concurrently
+    versions = await asyncio.to_thread(counts_cache.versions)
+    counts = counts_cache.get(versions)
+    if counts is None:
+        async with _stats_refresh:
+            counts = counts_cache.get(versions)
+            if counts is None:
+                primary = req.primary or await read_primary(req.client, STATS_TABLES)
+                results = await asyncio.gather(*(db.query(f'SELECT COUNT(*) AS n FROM {t}', primary=primary) for t in STATS_TABLES))
+                if any(r is None for r in results):
+                    return 500, {'error': 'Database connection failed'}, []
+                counts = {key: int(r[0]['n'] or 0) for key, r in zip(ENTITIES, results)}
+                counts_cache.put(counts, versions)
+    return 200, {'counts': counts, 'ttl': STATS_TTL}, []
+
+async def nested_route(req):
+    try:
+        columnar = columnar_requested(req.args)
+    except RequestParamError as e:
+        return 400, {'error': str(e)}, []
+    # The snapshot lives in this process; its refreshes use the thread-side pool
+    archived = archived_requested(req.args)
+    snapshot = await asyncio.to_thread(snapshot_above_average, columnar) if ANALYTICS_CONFIG['enabled'] and not archived else None
+    query = NESTED_QUERY['archived_sql' if archived else 'sql']
+    if snapshot is not None:
+        columns, rows = snapshot
+        results = {'columns': columns, 'rows': rows} if columnar else rows
+    else:
+        results = await db.query(query, columnar=columnar, primary=req.primary)
+        if results is None and archived:
+            return 500, {'error': 'Archive query failed'}, []
+        if columnar:
+            columns, rows = results or ([], [])
+            results = {'columns': columns, 'rows': rows}
+    return 200, {'query_type': 'NESTED', 'description': NESTED_QUERY['description'], 'data': results or []}, []
+
+async def aggregate_route(req):
+    archived = archived_requested(req.args)
+    total = await asyncio.to_thread(snapshot_order_count) if ANALYTICS_CONFIG['enabled'] and not archived else None
+    if total is not None:
+        return 200, {'query_type': 'AGGREGATE', 'description': AGGREGATE_QUERY['description'], 'data': {'total_orders': total}}, []
+    results = await db.query(AGGREGATE_QUERY['archived_sql' if archived else 'sql'], primary=req.primary)
+    if results is None and archived:
+        return 500, {'error': 'Archive query failed'}, []
+    return 200, {'query_type': 'AGGREGATE', 'description': AGGREGATE_QUERY['description'], 'data': results[0] if results else {}}, []
+
+async def health_route(req):
+    # Same contract as the Flask /api/health: breaker and pool state, plus a real query with ?deep=1
+    state = breaker.snapshot()
+    body = {'status': 'ERROR' if state['state'] == 'open' else 'OK', 'breaker': state,
+            'pool': {'size': db.pool.size, 'in_use': db.pool.size - db.pool.freesize, 'idle': db.pool.freesize,
+                     'max_size': db.pool.maxsize}, 'admission': native_admission.stats()}
+    if req.args.get('deep') in ('1', 'true') and body['status'] == 'OK' and not await db.query('SELECT 1 AS ok'):
+        body['status'] = 'ERROR'
+    return (200 if body['status'] == 'OK' else 503), body, []
+
+async def read_primary(client, tables):
+    # Same read-your-writes rule as get_read_connection() and pin_reads_after_write() on the Flask side
+    if not replicas.replicas:
+        return True
+    return await asyncio.to_thread(needs_primary, client, tables)
+
+ROUTES = {
+    '/api/health': ((), health_route),
+    '/api/stats': ((), stats_route),
+    '/api/analytics/nested-query': (('PRODUCTION_ORDER',), nested_route),
+    '/api/analytics/aggregate-query': (('PRODUCTION_ORDER',), aggregate_route)
+}
+
+def resolve(path):
+    # Returns (route label, tables read, handler, handler args) or None to fall through to Flask
+    if path in ROUTES:
+        tables, handler = ROUTES[path]
+        return path, tables, handler, ()
+    parts = path.split('/')
+    if len(parts) in (3, 4) and parts[1] == 'api' and parts[2] in ENTITIES and all(parts[1:]):
+        entity, table = parts[2], ENTITIES[parts[2]]['table']
+        if len(parts) == 3:
+            return f'/api/{entity}', (table,), list_route, (entity,)
+        return f'/api/{entity}/<key>', (table,), get_route, (entity, parts[3])
+    return None
+
+class Application:
+    def __init__(self, wsgi_app):
+        self.fallback = WSGIMiddleware(wsgi_app, workers=ASGI_CONFIG['wsgi_threads'])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            if scope['path'] == '/api/events' and EVENTS_CONFIG['enabled']:
+                return await self.events(Request(scope), receive, send)
+            route = resolve(scope['path'])
+            if route:
+                req = Request(scope)
+                if not req.wants_stream():
+                    return await self.serve(req, route, send)
+        return await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await db.open()
+                    await asyncio.to_thread(pool.warm)
+                    await asyncio.to_thread(ensure_archive_table)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await db.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def serve(self, req, route, send):
+        # Same cache/ETag semantics as the cached() decorator, sharing its cache and version counters
+        label, tables, handler, params = route
+        started = time.perf_counter()
+        req.primary = await read_primary(req.client, tables)
+        use_cache = CACHE_CONFIG['enabled'] and tables
+        use_etag = ETAG_CONFIG['enabled'] and tables
+        versions = etag = None
+        if use_cache or use_etag:
+            try:
+                versions = await asyncio.to_thread(lambda: table_versions.snapshot(tables) + out_of_band_markers(tables))
+            except Exception as e:
+                print(f'Cache Error: {e}')
+                use_cache = use_etag = False
+        key = cache_key(req.path, req.args)
+        headers = []
+        if use_etag:
+            etag = etag_for(key, versions)
+            headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'no-cache')]
+            matched = etag_match(parse_etags(req.headers.get('if-none-match')), etag)
+            if matched:
+                return await self.respond(send, req, label, started, 304, b'', [('ETag', f'"{matched}"'), ('Cache-Control', 'no-cache')])
+        hit = response_cache.get(key, versions) if use_cache else None
+        if hit is not None:
+            return await self.respond(send, req, label, started, 200, hit[0], list(hit[1]) + headers)
+        # Cache hits above never touch the database, so only misses are subject to shedding
+        cls = route_class(label)
+        try:
+            if cls is None:
+                status, payload, extra = await handler(req, *params)
+            else:
+                status, payload, extra = await self.admit(req, cls, handler, params)
+        except ServiceOverloaded as e:
+            return await self.respond(send, req, label, started, 503, json_body({'error': str(e)}),
+                                      [('Content-Type', 'application/json'), ('Retry-After', str(e.retry_after))])
+        body = json_body(payload)
+        base = [('Content-Type', 'application/json')] + extra
+        if status == 200 and use_cache:
+            response_cache.put(key, body, base, tables, versions, None)
+        return await self.respond(send, req, label, started, status, body, base + (headers if status == 200 else []))
+
+    async def admit(self, req, cls, handler, params):
+        if breaker.is_open():
+            raise ServiceOverloaded('Database unavailable', breaker.retry_after())
+        metered = ADMISSION_CONFIG['enabled']
+        if metered and not await native_admission.enter(cls):
+            raise ServiceOverloaded(f'Too many concurrent {cls} requests', ADMISSION_CONFIG['retry_after'])
+        token = route_class_var.set(cls)
+        try:
+            return await handler(req, *params)
+        finally:
+            route_class_var.reset(token)
+            if metered:
+                native_admission.leave(cls)
+
+    async def events(self, req, receive, send):
+        # SSE on the event loop: an idle subscriber costs a queue and a wake-up callback, not a thread
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        try:
+            since = parse_since(req.args.get('since', req.headers.get('last-event-id')))
+            subscriber, backlog, complete, seq = change_feed.subscribe(since, wake=lambda: loop.call_soon_threadsafe(ready.set))
+        except RequestParamError as e:
+            return await self.respond(send, req, '/api/events', time.perf_counter(), 400, json_body({'error': str(e)}), [('Content-Type', 'application/json')])
+        except FeedFull as e:
+            return await self.respond(send, req, '/api/events', time.perf_counter(), 503, json_body({'error': str(e)}), [('Content-Type', 'application/json')])
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+        disconnected = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'), (b'access-control-allow-origin', b'*')]})
+            await send({'type': 'http.response.body', 'body': event_stream_preamble(backlog, complete, seq).encode(), 'more_body': True})
+            while not subscriber.overflowed and not disconnected.done():
+                try:
+                    await asyncio.wait_for(ready.wait(), EVENTS_CONFIG['heartbeat'])
+                except asyncio.TimeoutError:
+                    pass
+                ready.clear()
+                frames = subscriber.drain()
+                await send({'type': 'http.response.body', 'body': (''.join(frames) if frames else ': keep-alive\n\n').encode(), 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            change_feed.unsubscribe(subscriber)
+
+    async def respond(self, send, req, label, started, status, body, headers):
+        if not any(k.lower() == 'access-control-allow-origin' for k, _ in headers):
+            headers = headers + [('Access-Control-Allow-Origin', '*')]
+        if status == 200:
+            body, encoding = compress_body(body, parse_accept_header(req.headers.get('accept-encoding')))
+            headers = headers + [('Vary', 'Accept-Encoding')] + ([('Content-Encoding', encoding)] if encoding else [])
+            if encoding:
+                # Same as app._compress_response: each content-coding gets its own strong tag
+                headers = [(k, '"' + coded_etag(v.strip('"'), encoding) + '"') if k.lower() == 'etag' else (k, v) for k, v in headers]
+        headers = headers + [('Content-Length', str(len(body)))]
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+        await send({'type': 'http.response.body', 'body': body})
+        if METRICS_CONFIG['enabled']:
+            metrics.observe_request(req.method, label, status, time.perf_counter() - started)
+
+application = Application(app)
@@ -0,0 +1,435 @@
+# Drives a mixed HTTP workload against the API and writes a machine-readable report.
+#
+#   python bench/run.py load --spawn flask --database FactoryManagementBench --out flask.json
+#   python bench/run.py load --spawn asgi --workers 4 --concurrency 256 --out asgi.json
+#   python bench/run.py load --url http://127.0.0.1:5000 --pid 1234 --workload read
+#   python bench/run.py compare flask.json asgi.json --threshold 10    exits 1 on a regression
+#
+# Seed the database with bench/seed.py first. DB round-trips are read from the server's Questions
+# counter, so they include every worker process; RSS covers the server process and its children.
+import argparse
+import bisect
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import mysql.connector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import DB_CONFIG
+from seed import DEFAULT_DATABASE
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative weights per operation; see OPERATIONS for what each one requests
+WORKLOADS = {
+    'read': {'list': 25, 'list_filtered': 10, 'search': 10, 'item': 35, 'stats': 5, 'join': 5, 'aggregate': 5,
+             'nested': 1, 'users': 1, 'function': 3},
+    'mixed': {'list': 20, 'list_filtered': 8, 'search': 8, 'item': 25, 'stats': 5, 'join': 4, 'aggregate': 4,
+              'nested': 1, 'users': 1, 'function': 3, 'procedure': 1, 'create': 8, 'patch': 8, 'delete': 4},
+    'write': {'list': 10, 'item': 10, 'create': 30, 'patch': 30, 'delete': 15, 'procedure': 5}
+}
+
+LIST_ENTITIES = ['employees', 'departments', 'factories', 'machines', 'products', 'orders']
+ID_FORMATS = {'employees': 'E{:08d}', 'departments': 'D{:04d}', 'factories': 'F{:03d}',
+              'machines': 'M{:07d}', 'products': 'P{:06d}', 'orders': 'O{:08d}'}
+
+class Worker:
+    # One keep-alive connection and its own RNG and pending writes per thread
+    def __init__(self, index, base, counts, seed):
+        self.index = index
+        self.base = base
+        self.counts = counts
+        self.rng = random.Random(f'{seed}:{index}')
+        self.created = []
+        self.serial = 0
+        self.conn = None
+
+    def request(self, method, path, body=None):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.base.hostname, self.base.port or 80, timeout=60)
+        headers = {'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+        if response.getheader('Connection', '').lower() == 'close':
+            self.conn.close()
+            self.conn = None
+        return response.status, data
+
+    def random_id(self, entity):
+        return ID_FORMATS[entity].format(self.rng.randint(1, max(1, self.counts.get(entity, 1))))
+
+    def new_order(self):
+        self.serial += 1
+        order_id = f'BN{self.index:03d}-{self.serial:09d}'
+        return {'Order_ID': order_id, 'Order_date': '2026-01-05', 'Due_date': '2026-03-01',
+                'Priority': self.rng.choice(['Low', 'Medium', 'High']), 'Status': 'Pending', 'Qty': self.rng.randint(1, 1000)}
+
+def op_list(w):
+    return w.request('GET', f'/api/{w.rng.choice(LIST_ENTITIES)}?limit=100')
+
+def op_list_filtered(w):
+    status = w.rng.choice(['Pending', 'In Progress', 'Completed', 'Delayed'])
+    return w.request('GET', f'/api/orders?Status={status.replace(" ", "%20")}&limit=100')
+
+def op_search(w):
+    return w.request('GET', f'/api/employees?q={w.rng.choice("ABCDEFGHIJKLMNOP")}&limit=50')
+
+def op_item(w):
+    entity = w.rng.choice(LIST_ENTITIES)
+    return w.request('GET', f'/api/{entity}/{w.random_id(entity)}')
+
+def op_stats(w):
+    return w.request('GET', '/api/stats')
+
+def op_join(w):
+    return w.request('GET', '/api/analytics/join-query?limit=100')
+
+def op_aggregate(w):
+    return w.request('GET', '/api/analytics/aggregate-query')
+
+def op_nested(w):
+    return w.request('GET', '/api/analytics/nested-query')
+
+def op_users(w):
+    return w.request('GET', '/api/users')
+
+def op_function(w):
+    if w.rng.random() < 0.5:
+        return w.request('POST', '/api/db-objects/functions', {'functionId': 'get_dept_by_emp', 'inputs': [w.random_id('employees')]})
+    return w.request('POST', '/api/db-objects/functions', {'functionId': 'total_qty_by_product', 'inputs': [w.random_id('products')]})
+
+def op_procedure(w):
+    if w.rng.random() < 0.8:
+        return w.request('POST', '/api/db-objects/procedures',
+                         {'procedureId': 'assign_machine', 'inputs': [w.random_id('machines'), w.random_id('factories')]})
+    return w.request('POST', '/api/db-objects/procedures', {'procedureId': 'update_priority', 'async': True})
+
+def op_create(w):
+    order = w.new_order()
+    status, data = w.request('POST', '/api/orders', order)
+    if status < 400:
+        w.created.append(order['Order_ID'])
+    return status, data
+
+def op_patch(w):
+    if not w.created:
+        return op_create(w)
+    return w.request('PATCH', f'/api/orders/{w.rng.choice(w.created)}', {'Qty': w.rng.randint(1, 1000), 'Status': 'In Progress'})
+
+def op_delete(w):
+    if not w.created:
+        return op_create(w)
+    return w.request('DELETE', f'/api/orders/{w.created.pop()}')
+
+OPERATIONS = {
+    'list': op_list, 'list_filtered': op_list_filtered, 'search': op_search, 'item': op_item, 'stats': op_stats,
+    'join': op_join, 'aggregate': op_aggregate, 'nested': op_nested, 'users': op_users, 'function': op_function,
+    'procedure': op_procedure, 'create': op_create, 'patch': op_patch, 'delete': op_delete
+}
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    return {'requests': len(values), 'errors': errors, 'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0,
+            'p50_ms': _ms(percentile(values, 0.50)), 'p95_ms': _ms(percentile(values, 0.95)),
+            'p99_ms': _ms(percentile(values, 0.99)), 'max_ms': _ms(values[-1] if values else None)}
+
+def process_rss(pid):
+    # Resident memory of pid plus its children (pre-fork workers), in bytes
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [proc] + proc.children(recursive=True))
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    parents, rss = {}, {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        parents[int(entry)] = int(fields['PPid'])
+        rss[int(entry)] = int(fields.get('VmRSS', '0 kB').split()[0]) * 1024
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [p for p, pp in parents.items() if pp == parent and p not in tree]
+        tree.update(children)
+        frontier.extend(children)
+    return sum(rss.get(p, 0) for p in tree) if pid in rss else None
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            value = process_rss(self.pid)
+            if value is not None:
+                self.samples.append(value)
+            self.stopped.wait(self.interval)
+
+    def report(self):
+        if not self.samples:
+            return None
+        start, peak, end = (round(v / 1048576, 1) for v in (self.samples[0], max(self.samples), self.samples[-1]))
+        return {'start_mb': start, 'peak_mb': peak, 'end_mb': end}
+
+def db_questions(database):
+    conn = mysql.connector.connect(**dict(DB_CONFIG, database=database))
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(cursor.fetchall()[0][1])
+    finally:
+        conn.close()
+
+def spawn_server(kind, args):
+    env = dict(os.environ, MYSQL_DATABASE=args.database)
+    if kind == 'flask':
+        command = [sys.executable, 'app.py']
+    else:
+        env.update(ASGI_BIND=f'{args.base.hostname}:{args.base.port}', ASGI_WORKERS=str(args.workers))
+        command = [sys.executable, 'serve.py']
+    proc = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    probe = Worker(0, args.base, {}, 'probe')
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f'{kind} server exited with code {proc.returncode}')
+        try:
+            if probe.request('GET', '/api/health?deep=1')[0] == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit(f'{kind} server did not become healthy within 60s')
+
+def run_load(args):
+    args.base = urlsplit(args.url)
+    weights = dict(WORKLOADS[args.workload])
+    for name in args.exclude:
+        weights.pop(name, None)
+    names, cumulative, total = [], [], 0
+    for name, weight in weights.items():
+        total += weight
+        names.append(name)
+        cumulative.append(total)
+
+    server = spawn_server(args.spawn, args) if args.spawn else None
+    pid = server.pid if server else args.pid
+    try:
+        status, data = Worker(0, args.base, {}, 'stats').request('GET', '/api/stats')
+        counts = json.loads(data).get('counts', {}) if status == 200 else {}
+        results = {name: [] for name in names}
+        errors = {name: 0 for name in names}
+        lock = threading.Lock()
+        started = time.monotonic()
+        measure_from = started + args.warmup
+        stop_at = measure_from + args.duration
+        window = {}
+
+        def loop(index):
+            worker = Worker(index, args.base, counts, args.seed)
+            mine = {name: [] for name in names}
+            failed = {name: 0 for name in names}
+            while True:
+                now = time.monotonic()
+                if now >= stop_at:
+                    break
+                name = names[bisect.bisect_right(cumulative, worker.rng.random() * total)]
+                begin = time.perf_counter()
+                try:
+                    status, _ = OPERATIONS[name](worker)
+                    ok = status < 400
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                elapsed = time.perf_counter() - begin
+                if now >= measure_from:
+                    mine[name].append(elapsed)
+                    if not ok:
+                        failed[name] += 1
+            with lock:
+                for name in names:
+                    results[name].extend(mine[name])
+                    errors[name] += failed[name]
+
+        def mark_window():
+            # Snapshot DB counters at the edges of the measured window
+            time.sleep(max(0.0, measure_from - time.monotonic()))
+            window['questions_start'] = db_questions(args.database)
+            time.sleep(max(0.0, stop_at - time.monotonic()))
+            window['questions_end'] = db_questions(args.database)
+
+        sampler = RssSampler(pid) if pid else None
+        if sampler:
+            sampler.start()
+        threads = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(args.concurrency)]
+        marker = threading.Thread(target=mark_window, daemon=True)
+        marker.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        marker.join()
+        if sampler:
+            sampler.stopped.set()
+            sampler.join()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    all_latencies = [v for name in names for v in results[name]]
+    totals = summarize(all_latencies, sum(errors.values()), args.duration)
+    # The two SHOW STATUS probes are themselves counted; subtract them
+    questions = window['questions_end'] - window['questions_start'] - 2
+    totals['db_round_trips_per_request'] = round(questions / totals['requests'], 3) if totals['requests'] else None
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'server': args.spawn or 'external',
+            'workers': args.workers if args.spawn == 'asgi' else None,
+            'url': args.url,
+            'database': args.database,
+            'workload': args.workload,
+            'weights': weights,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'row_counts': counts,
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'totals': totals,
+        'rss': sampler.report() if sampler else None,
+        'operations': {name: summarize(results[name], errors[name], args.duration) for name in names}
+    }
+    return report
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_report(report):
+    totals = report['totals']
+    print(f"{'operation':<14} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in list(report['operations'].items()) + [('TOTAL', totals)]:
+        print(f"{name:<14} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>9} "
+              f"{row['p50_ms'] or '-':>9} {row['p95_ms'] or '-':>9} {row['p99_ms'] or '-':>9}")
+    print(f"db round-trips/request: {totals['db_round_trips_per_request']}")
+    if report['rss']:
+        print(f"rss MB: start {report['rss']['start_mb']}, peak {report['rss']['peak_mb']}, end {report['rss']['end_mb']}")
+
+def compare(args):
+    # A regression is throughput falling, or p95/p99 rising, by more than the threshold percentage
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows = [('TOTAL', base['totals'], candidate['totals'])]
+    rows += [(name, base['operations'][name], candidate['operations'][name])
+             for name in base['operations'] if name in candidate['operations']]
+    regressions = []
+
+    def change(old, new):
+        return None if not old or new is None else (new - old) / old * 100
+
+    print(f"{'operation':<14} {'rps':>18} {'p95 ms':>20} {'p99 ms':>20}")
+    for name, old, new in rows:
+        cells = []
+        for metric, worse_if_higher in (('throughput_rps', False), ('p95_ms', True), ('p99_ms', True)):
+            delta = change(old.get(metric), new.get(metric))
+            cells.append(f"{old.get(metric)}->{new.get(metric)} ({'-' if delta is None else f'{delta:+.1f}%'})")
+            if delta is not None and (delta > args.threshold if worse_if_higher else -delta > args.threshold):
+                regressions.append(f'{name} {metric} {delta:+.1f}%')
+        print(f'{name:<14} ' + ' '.join(f'{c:>20}' for c in cells))
+    trips = (base['totals'].get('db_round_trips_per_request'), candidate['totals'].get('db_round_trips_per_request'))
+    print(f'db round-trips/request: {trips[0]} -> {trips[1]}')
+    if regressions:
+        print('Regressions beyond {}%: {}'.format(args.threshold, ', '.join(regressions)))
+        return 1
+    print(f'No regressions beyond {args.threshold}%')
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='API load and latency benchmark')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    load = sub.add_parser('load', help='run a workload and write a JSON report')
+    load.add_argument('--url', default='http://127.0.0.1:5000')
+    load.add_argument('--spawn', choices=['flask', 'asgi'], help='start the server against --database for the run')
+    load.add_argument('--workers', type=int, default=4, help='ASGI worker processes with --spawn asgi')
+    load.add_argument('--pid', type=int, help='server pid for RSS sampling when not spawned')
+    load.add_argument('--database', default=DEFAULT_DATABASE)
+    load.add_argument('--workload', choices=sorted(WORKLOADS), default='mixed')
+    load.add_argument('--exclude', nargs='*', default=[], choices=sorted(OPERATIONS), help='operations to leave out')
+    load.add_argument('--concurrency', type=int, default=32)
+    load.add_argument('--duration', type=float, default=30, help='measured seconds')
+    load.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before the window')
+    load.add_argument('--seed', default='bench')
+    load.add_argument('--out', help='write the JSON report here (default: stdout)')
+
+    cmp = sub.add_parser('compare', help='diff two reports; exits 1 on regression')
+    cmp.add_argument('base')
+    cmp.add_argument('candidate')
+    cmp.add_argument('--threshold', type=float, default=10, help='allowed change in percent')
+
+    args = parser.parse_args()
+    if args.command == 'compare':
+        sys.exit(compare(args))
+    report = run_load(args)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print_report(report)
+        print(f'Report written to {args.out}')
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
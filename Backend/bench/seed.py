@@ -0,0 +1,233 @@
+# Seeds a throwaway MySQL/MariaDB database with a stand-in FactoryManagement schema and generated data.
+#
+#   python bench/seed.py --orders 100000                   create FactoryManagementBench at 100k orders
+#   python bench/seed.py --orders 10000000 --reset         drop and rebuild it at 10M orders
+#
+# Finishes with migrate_indexes.py's EXPLAIN check against the seeded data and exits 1 if it fails.
+#
+# Connection settings come from .env (MYSQL_HOST, MYSQL_USER, ...); the database name does not, so the
+# real database is never touched. Data is deterministic for a given --seed and scale, which keeps runs
+# comparable. Other tables scale with --orders (see scale_for()).
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+from mysql.connector import Error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import DB_CONFIG
+from migrate_indexes import check, migrate
+
+DEFAULT_DATABASE = 'FactoryManagementBench'
+BATCH_SIZE = 5000
+
+TABLES = [
+    '''CREATE TABLE DEPARTMENT (
+        Dept_ID VARCHAR(20) PRIMARY KEY,
+        Dept_name VARCHAR(100) NOT NULL,
+        Budget DECIMAL(14, 2) DEFAULT 0)''',
+    '''CREATE TABLE EMPLOYEE (
+        E_ID VARCHAR(20) PRIMARY KEY,
+        FName VARCHAR(50) NOT NULL,
+        LName VARCHAR(50) NOT NULL,
+        Email VARCHAR(120) NOT NULL,
+        Position VARCHAR(50),
+        Category VARCHAR(50),
+        Salary DECIMAL(12, 2),
+        Hire_date DATE)''',
+    '''CREATE TABLE EMPLOYS (
+        E_ID VARCHAR(20) NOT NULL,
+        Dept_ID VARCHAR(20) NOT NULL,
+        PRIMARY KEY (E_ID, Dept_ID),
+        KEY idx_employs_dept (Dept_ID),
+        FOREIGN KEY (E_ID) REFERENCES EMPLOYEE (E_ID) ON DELETE CASCADE,
+        FOREIGN KEY (Dept_ID) REFERENCES DEPARTMENT (Dept_ID) ON DELETE CASCADE)''',
+    '''CREATE TABLE FACTORY (
+        F_ID VARCHAR(20) PRIMARY KEY,
+        F_Name VARCHAR(100) NOT NULL,
+        Address VARCHAR(200),
+        Ph_no VARCHAR(20),
+        Manager_name VARCHAR(100))''',
+    '''CREATE TABLE MACHINE (
+        M_ID VARCHAR(20) PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Model VARCHAR(50),
+        Manufacturer VARCHAR(100),
+        Purchase_date DATE,
+        Status VARCHAR(20) DEFAULT 'Working',
+        F_ID VARCHAR(20),
+        FOREIGN KEY (F_ID) REFERENCES FACTORY (F_ID) ON DELETE SET NULL)''',
+    '''CREATE TABLE PRODUCT (
+        P_ID VARCHAR(20) PRIMARY KEY,
+        P_Name VARCHAR(100) NOT NULL,
+        Category VARCHAR(50),
+        Unit_price DECIMAL(10, 2))''',
+    '''CREATE TABLE PRODUCTION_ORDER (
+        Order_ID VARCHAR(20) PRIMARY KEY,
+        Order_date DATE,
+        Due_date DATE,
+        Priority VARCHAR(10) DEFAULT 'Medium',
+        Status VARCHAR(20) DEFAULT 'Pending',
+        Qty INT,
+        P_ID VARCHAR(20),
+        KEY idx_order_product (P_ID))'''
+]
+
+# Created after the bulk load so the per-row trigger checks don't slow it down
+ROUTINES = [
+    '''CREATE FUNCTION get_department_by_emp(emp VARCHAR(20)) RETURNS VARCHAR(100) READS SQL DATA
+       RETURN (SELECT d.Dept_name FROM EMPLOYS e JOIN DEPARTMENT d ON d.Dept_ID = e.Dept_ID WHERE e.E_ID = emp LIMIT 1)''',
+    '''CREATE FUNCTION total_qty_by_product(prod VARCHAR(20)) RETURNS INT READS SQL DATA
+       RETURN (SELECT COALESCE(SUM(Qty), 0) FROM PRODUCTION_ORDER WHERE P_ID = prod)''',
+    '''CREATE PROCEDURE assign_machine_to_factory(IN machine VARCHAR(20), IN factory VARCHAR(20))
+       UPDATE MACHINE SET F_ID = factory WHERE M_ID = machine''',
+    '''CREATE PROCEDURE update_priority_based_on_qty()
+       UPDATE PRODUCTION_ORDER SET Priority = CASE WHEN Qty >= 500 THEN 'High' WHEN Qty >= 100 THEN 'Medium' ELSE 'Low' END''',
+    '''CREATE TRIGGER order_status_update BEFORE UPDATE ON PRODUCTION_ORDER FOR EACH ROW
+       SET NEW.Status = IF(NEW.Due_date < CURDATE() AND NEW.Status = 'Pending', 'Delayed', NEW.Status)''',
+    '''CREATE TRIGGER email_unique BEFORE INSERT ON EMPLOYEE FOR EACH ROW
+       BEGIN
+         IF EXISTS (SELECT 1 FROM EMPLOYEE WHERE LOWER(Email) = LOWER(NEW.Email)) THEN
+           SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Email already exists';
+         END IF;
+       END'''
+]
+
+FIRST_NAMES = ['Asha', 'Ben', 'Chen', 'Dana', 'Eli', 'Farah', 'Gus', 'Hana', 'Ivan', 'Jia', 'Kofi', 'Lena', 'Mo', 'Nia', 'Omar', 'Priya']
+LAST_NAMES = ['Khan', 'Lopez', 'Smith', 'Tanaka', 'Okafor', 'Rossi', 'Novak', 'Singh', 'Berg', 'Ng', 'Diaz', 'Meyer']
+POSITIONS = ['Engineer', 'Technician', 'Supervisor', 'Operator', 'Analyst', 'Manager']
+CATEGORIES = ['Technical', 'Operations', 'Management', 'Quality']
+MACHINE_STATUSES = ['Working', 'Working', 'Working', 'Maintenance', 'Broken']
+ORDER_STATUSES = ['Pending', 'In Progress', 'Completed', 'Completed', 'Completed', 'Delayed']
+PRIORITIES = ['Low', 'Medium', 'High']
+PRODUCT_CATEGORIES = ['Electronics', 'Mechanical', 'Textile', 'Chemical', 'Food']
+
+def scale_for(orders):
+    return {
+        'orders': orders,
+        'employees': max(1000, orders // 20),
+        'departments': 50,
+        'factories': 20,
+        'machines': max(200, orders // 100),
+        'products': max(100, orders // 1000)
+    }
+
+def _day(rng, start=date(2015, 1, 1), span=4000):
+    return start + timedelta(days=rng.randrange(span))
+
+def generate(table, n, rng, scale):
+    # Yields rows in primary key order; ids are zero-padded so keyset pages and random lookups stay cheap
+    for i in range(1, n + 1):
+        if table == 'DEPARTMENT':
+            yield (f'D{i:04d}', f'Department {i}', round(rng.uniform(1e5, 5e6), 2))
+        elif table == 'EMPLOYEE':
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield (f'E{i:08d}', first, last, f'{first}.{last}.{i}@factory.test'.lower(), rng.choice(POSITIONS),
+                   rng.choice(CATEGORIES), round(rng.uniform(30000, 150000), 2), _day(rng))
+        elif table == 'EMPLOYS':
+            yield (f'E{i:08d}', f'D{rng.randint(1, scale["departments"]):04d}')
+        elif table == 'FACTORY':
+            yield (f'F{i:03d}', f'Plant {i}', f'{rng.randint(1, 999)} Industrial Way', f'555-{rng.randint(1000, 9999)}',
+                   f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}')
+        elif table == 'MACHINE':
+            yield (f'M{i:07d}', f'Machine {i}', f'X{rng.randint(100, 999)}', rng.choice(['Siemens', 'Fanuc', 'ABB', 'Bosch']),
+                   _day(rng), rng.choice(MACHINE_STATUSES), f'F{rng.randint(1, scale["factories"]):03d}')
+        elif table == 'PRODUCT':
+            yield (f'P{i:06d}', f'Product {i}', rng.choice(PRODUCT_CATEGORIES), round(rng.uniform(1, 2000), 2))
+        elif table == 'PRODUCTION_ORDER':
+            ordered = _day(rng)
+            yield (f'O{i:08d}', ordered, ordered + timedelta(days=rng.randint(7, 120)), rng.choice(PRIORITIES),
+                   rng.choice(ORDER_STATUSES), rng.randint(1, 1000), f'P{rng.randint(1, scale["products"]):06d}')
+
+LOAD_ORDER = [('DEPARTMENT', 'departments'), ('EMPLOYEE', 'employees'), ('EMPLOYS', 'employees'),
+              ('FACTORY', 'factories'), ('MACHINE', 'machines'), ('PRODUCT', 'products'), ('PRODUCTION_ORDER', 'orders')]
+
+def load(conn, scale, seed):
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SET SESSION unique_checks = 0')
+        cursor.execute('SET SESSION foreign_key_checks = 0')
+        for table, size in LOAD_ORDER:
+            rng = random.Random(f'{seed}:{table}')
+            started = time.perf_counter()
+            batch, total = [], scale[size]
+            sql = None
+            for row in generate(table, total, rng, scale):
+                if sql is None:
+                    sql = f'INSERT INTO {table} VALUES ({", ".join(["%s"] * len(row))})'
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(sql, batch)
+                    conn.commit()
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                conn.commit()
+            print(f'loaded  {table:<17} {total:>10} rows in {time.perf_counter() - started:.1f}s')
+        cursor.execute('SET SESSION unique_checks = 1')
+        cursor.execute('SET SESSION foreign_key_checks = 1')
+    finally:
+        cursor.close()
+
+def run(statements, conn):
+    cursor = conn.cursor()
+    try:
+        for stmt in statements:
+            cursor.execute(stmt)
+            if cursor.with_rows:
+                cursor.fetchall()
+        conn.commit()
+    finally:
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a benchmark database')
+    parser.add_argument('--orders', type=int, default=100000, help='PRODUCTION_ORDER rows (10k to 10M)')
+    parser.add_argument('--database', default=DEFAULT_DATABASE)
+    parser.add_argument('--seed', default='factory')
+    parser.add_argument('--reset', action='store_true', help='drop the database first if it exists')
+    args = parser.parse_args()
+    if args.database.lower() == DB_CONFIG['database'].lower():
+        parser.error(f'refusing to seed the application database {DB_CONFIG["database"]}; pick another --database')
+
+    server = {k: v for k, v in DB_CONFIG.items() if k != 'database'}
+    try:
+        conn = mysql.connector.connect(**server)
+    except Error as e:
+        print(f'Connection Error: {e}')
+        sys.exit(2)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = %s', (args.database,))
+        if cursor.fetchall():
+            if not args.reset:
+                print(f'{args.database} already exists; pass --reset to rebuild it')
+                sys.exit(1)
+            cursor.execute(f'DROP DATABASE `{args.database}`')
+        cursor.execute(f'CREATE DATABASE `{args.database}`')
+        cursor.execute(f'USE `{args.database}`')
+        cursor.close()
+
+        scale = scale_for(args.orders)
+        started = time.perf_counter()
+        run(TABLES, conn)
+        load(conn, scale, args.seed)
+        migrate(conn)
+        run(ROUTINES, conn)
+        run([f'ANALYZE TABLE {table}' for table, _ in LOAD_ORDER], conn)
+        print(f'Seeded {args.database} ({", ".join(f"{k}={v}" for k, v in scale.items())}) in {time.perf_counter() - started:.1f}s')
+        # Every filter and sort the API accepts must still be answered from an index at this scale
+        failures = check(conn)
+        if failures:
+            print(f'{failures} filter(s) or sort(s) without an index plan; see FAIL lines above')
+            sys.exit(1)
+        print(f'Point the API at it with MYSQL_DATABASE={args.database}')
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# Creates the secondary indexes behind the list-route filters and verifies them with EXPLAIN.
+#
+#   python migrate_indexes.py            create any missing indexes
+#   python migrate_indexes.py --dry-run  print the DDL without running it
+#   python migrate_indexes.py --check    EXPLAIN every allowed filter and sort; exits 1 if one cannot use an
+#                                        index or the optimizer still picks a full scan ('warn' means another
+#                                        index was chosen)
+#
+# The check also runs automatically at the end of every bench/seed.py build, against the seeded schema.
+# Tables under INDEX_CHECK_MIN_ROWS (estimated) are too small for a plan to mean anything: the optimizer
+# rightly prefers a scan there, so a scan is reported as 'skip' instead of failing. A filter whose index
+# is missing from possible_keys fails at any size.
+import os
+import sys
+import mysql.connector
+from mysql.connector import Error
+from werkzeug.datastructures import MultiDict
+
+from app import DB_CONFIG, ENTITIES, build_list_query, filterable_columns, sortable_columns
+
+CHECK_MIN_ROWS = int(os.getenv('INDEX_CHECK_MIN_ROWS', 10000))
+
+def existing_indexes(cursor, table):
+    cursor.execute('SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', (table,))
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate(conn, dry_run=False):
+    cursor = conn.cursor()
+    try:
+        for spec in ENTITIES.values():
+            present = existing_indexes(cursor, spec['table'])
+            for name, columns in spec['indexes'].items():
+                if name in present:
+                    print(f'ok      {spec["table"]}.{name}')
+                    continue
+                ddl = f'CREATE INDEX {name} ON {spec["table"]} ({", ".join(columns)})'
+                print(f'create  {ddl}')
+                if not dry_run:
+                    cursor.execute(ddl)
+            if spec.get('archive'):
+                # Created after the indexes so the cold tier starts with the same ones
+                ddl = f'CREATE TABLE IF NOT EXISTS {spec["archive"]} LIKE {spec["table"]}'
+                print(f'ensure  {ddl}')
+                if not dry_run:
+                    cursor.execute(ddl)
+    finally:
+        cursor.close()
+
+def _sample(column):
+    return '2026-01-01' if 'date' in column.lower() else 'x'
+
+def check(conn, min_rows=CHECK_MIN_ROWS):
+    # Each filter must have an index on its column among the optimizer's possible keys, and on tables of
+    # min_rows or more the plan must actually use an index rather than scanning the table
+    failures = 0
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for entity, spec in ENTITIES.items():
+            cursor.execute('SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                           (spec['table'],))
+            estimate = cursor.fetchall()
+            small = (estimate[0]['TABLE_ROWS'] or 0) < min_rows if estimate else True
+            leading = {cols[0]: name for name, cols in spec['indexes'].items()}
+            leading[spec['pk']] = 'PRIMARY'
+            probes = []
+            for column in sorted(filterable_columns(spec)):
+                probes.append((column, MultiDict([(column, _sample(column))])))
+                probes.append((column, MultiDict([(f'{column}_lt', _sample(column))])))
+                probes.append((column, MultiDict([(f'{column}_in', f'{_sample(column)},{_sample(column)}')])))
+                if 'date' not in column.lower():
+                    probes.append((column, MultiDict([(f'{column}_prefix', 'x')])))
+            if spec['search']:
+                probes.append((spec['search'][0], MultiDict([('q', 'x')])))
+            for column in sorted(sortable_columns(spec) - {spec['pk']}):
+                # A page sorted on an index reads it in order instead of filesorting the table
+                probes.append((column, MultiDict([('sort', column), ('limit', '10')])))
+            for column, args in probes:
+                sql, params, _ = build_list_query(entity, args)
+                cursor.execute('EXPLAIN ' + sql, params)
+                plan = cursor.fetchall()[0]
+                possible = set((plan.get('possible_keys') or '').split(','))
+                chosen = set((plan.get('key') or '').split(','))
+                wanted = {leading[c] for c in (spec['search'] if 'q' in args else [column])}
+                if 'sort' in args:
+                    # No WHERE to match, so possible_keys is empty; the index must be the one read, in order
+                    possible |= chosen
+                scanned = not plan.get('key') or plan.get('type') == 'ALL'
+                if scanned and small and ('sort' in args or wanted <= possible):
+                    status = 'skip'
+                elif not wanted <= possible or scanned:
+                    status = 'FAIL'
+                    failures += 1
+                elif wanted & chosen:
+                    status = 'ok  '
+                else:
+                    # Another index answered it: not a scan, but not the index the filter was built for
+                    status = 'warn'
+                filters = '&'.join(f'{k}={v}' for k, v in args.items())
+                print(f"{status}  {spec['table']}?{filters}  type={plan.get('type')} key={plan.get('key')} possible={plan.get('possible_keys')} rows={plan.get('rows')}")
+    finally:
+        cursor.close()
+    return failures
+
+if __name__ == '__main__':
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f'Connection Error: {e}')
+        sys.exit(2)
+    try:
+        if '--check' in sys.argv:
+            failures = check(conn)
+            print(f'{failures} filter(s) or sort(s) without an index plan' if failures else 'All filters and sorts use an index')
+            sys.exit(1 if failures else 0)
+        migrate(conn, dry_run='--dry-run' in sys.argv)
+    finally:
+        conn.close()
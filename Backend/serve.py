@@ -0,0 +1,55 @@
+# Production launcher for the ASGI entry point.
+#
+#   python serve.py                        ASGI_WORKERS processes on ASGI_BIND
+#
+# Uses gunicorn's pre-fork master with uvicorn workers where gunicorn is available (Linux/macOS),
+# otherwise uvicorn's own multi-process supervisor (Windows). Each worker opens its own pools, so
+# size ASGI_DB_POOL_MAX * ASGI_WORKERS below the server's max_connections. Set CACHE_REDIS_URL so
+# writes handled by one worker invalidate the response cache in the others.
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERVE_CONFIG = {
+    'bind': os.getenv('ASGI_BIND', '0.0.0.0:5000'),
+    'workers': int(os.getenv('ASGI_WORKERS', multiprocessing.cpu_count() * 2)),
+    'backlog': int(os.getenv('ASGI_BACKLOG', 4096)),
+    'keepalive': int(os.getenv('ASGI_KEEPALIVE', 30)),
+    'graceful_timeout': int(os.getenv('ASGI_GRACEFUL_TIMEOUT', 30))
+}
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', SERVE_CONFIG['bind'])
+            self.cfg.set('workers', SERVE_CONFIG['workers'])
+            self.cfg.set('worker_class', 'uvicorn.workers.UvicornWorker')
+            self.cfg.set('backlog', SERVE_CONFIG['backlog'])
+            self.cfg.set('keepalive', SERVE_CONFIG['keepalive'])
+            self.cfg.set('graceful_timeout', SERVE_CONFIG['graceful_timeout'])
+
+        def load(self):
+            from asgi import application
+            return application
+
+    Server().run()
+
+def run_uvicorn():
+    import uvicorn
+    host, _, port = SERVE_CONFIG['bind'].rpartition(':')
+    uvicorn.run('asgi:application', host=host, port=int(port), workers=SERVE_CONFIG['workers'],
+                backlog=SERVE_CONFIG['backlog'], timeout_keep_alive=SERVE_CONFIG['keepalive'],
+                timeout_graceful_shutdown=SERVE_CONFIG['graceful_timeout'], lifespan='on')
+
+if __name__ == '__main__':
+    try:
+        import gunicorn
+    except ImportError:
+        run_uvicorn()
+    else:
+        run_gunicorn()
@@ -25,3 +25,78 @@ export const apiCall = async (url, options = {}) => {
     throw error
   }
 }
+
+// Live change feed (/api/events). One EventSource is shared by every subscriber;
+// listener(type, event) gets 'change' events plus 'reset' when missed changes require a refetch.
+// Callers fall back to polling whenever changeFeedConnected() is false.
+const changeListeners = new Set()
+let changeSource = null
+let lastEventId = null
+let reopenTimer = null
+let probing = false
+let feedUnavailable = false
+
+const dispatchChange = (type, event) => changeListeners.forEach(listener => listener(type, event))
+
+const openChangeFeed = () => {
+  const since = lastEventId ? `?since=${lastEventId}` : ''
+  changeSource = new EventSource(`${api.defaults.baseURL}/events${since}`)
+  changeSource.addEventListener('ready', e => { lastEventId = e.lastEventId })
+  changeSource.addEventListener('change', e => {
+    lastEventId = e.lastEventId
+    dispatchChange('change', JSON.parse(e.data))
+  })
+  changeSource.addEventListener('reset', () => dispatchChange('reset'))
+  changeSource.onerror = () => {
+    // EventSource retries dropped streams itself; it gives up only on error responses.
+    // A disabled (404) or full (503) feed is left closed until every subscriber has gone;
+    // otherwise reopening with ?since= lets the server replay what was missed, or send 'reset'
+    if (changeSource.readyState === EventSource.CLOSED) {
+      changeSource = null
+      probing = true
+      probeChangeFeed().then(status => {
+        probing = false
+        if (status === 404 || status === 503) {
+          feedUnavailable = true
+          return
+        }
+        if (changeListeners.size === 0) return
+        reopenTimer = setTimeout(() => {
+          reopenTimer = null
+          openChangeFeed()
+        }, 5000)
+      })
+    }
+  }
+}
+
+const probeChangeFeed = async () => {
+  // EventSource doesn't expose the status of a failed response, so ask with a request aborted after the headers
+  const controller = new AbortController()
+  try {
+    const response = await fetch(`${api.defaults.baseURL}/events`, { signal: controller.signal })
+    return response.status
+  } catch {
+    return null
+  } finally {
+    controller.abort()
+  }
+}
+
+export const subscribeChanges = (listener) => {
+  changeListeners.add(listener)
+  if (!changeSource && !reopenTimer && !probing && !feedUnavailable) openChangeFeed()
+  return () => {
+    changeListeners.delete(listener)
+    if (changeListeners.size === 0) {
+      clearTimeout(reopenTimer)
+      reopenTimer = null
+      changeSource?.close()
+      changeSource = null
+      // The next page to subscribe tries the feed again
+      feedUnavailable = false
+    }
+  }
+}
+
+export const changeFeedConnected = () => changeSource?.readyState === EventSource.OPEN
@@ -48,13 +48,12 @@ export default function Analytics() {
   d.Budget as DepartmentBudget,
   e.Salary,
   e.Hire_date,
-  COUNT(DISTINCT po.Order_ID) as OrdersInvolved,
-  SUM(po.Qty) as TotalQuantityHandled
+  IF(po.Order_ID IS NULL, 0, 1) as OrdersInvolved,
+  po.Qty as TotalQuantityHandled
 FROM EMPLOYEE e
 LEFT JOIN EMPLOYS emp ON e.E_ID = emp.E_ID
 LEFT JOIN DEPARTMENT d ON emp.Dept_ID = d.Dept_ID
-LEFT JOIN PRODUCTION_ORDER po ON e.E_ID = po.Order_ID OR 1=0
-GROUP BY e.E_ID, e.FName, e.LName, e.Email, e.Position, d.Dept_name, d.Budget, e.Salary, e.Hire_date
+LEFT JOIN PRODUCTION_ORDER po ON po.Order_ID = e.E_ID
 ORDER BY e.E_ID`;
       case 'nested':
         return `SELECT * FROM PRODUCTION_ORDER 
@@ -1,17 +1,35 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Trash2, Edit2, Plus, AlertCircle } from 'lucide-react'
 import Modal from '../components/Modal'
 import '../pages/CRUD.css'
-import { apiCall } from '../api'
+import { apiCall, subscribeChanges, changeFeedConnected } from '../api'
+
+const PAGE_SIZE = 100
+
+// Applies one change-feed event to the loaded rows; returns null when only a refetch can be correct
+const applyChange = (rows, event, idField, complete) => {
+  const index = rows.findIndex(r => String(r[idField]) === String(event.key))
+  if (event.op === 'delete') return index === -1 ? rows : rows.filter((_, i) => i !== index)
+  if (!event.row) return null
+  if (index !== -1) return rows.map((r, i) => (i === index ? event.row : r))
+  // A new row on a partially loaded list shows up when its page is loaded
+  return complete ? rows.concat([event.row]) : rows
+}
 
 export default function CRUD({ entity }) {
   const [data, setData] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [showModal, setShowModal] = useState(false)
   const [editingId, setEditingId] = useState(null)
   const [formData, setFormData] = useState({})
   const [error, setError] = useState(null)
+  const [search, setSearch] = useState('')
   const [success, setSuccess] = useState(null)
+  const refetchTimer = useRef(null)
+  const dataRef = useRef(data)
+  dataRef.current = data
 
   const getConfig = () => {
     const configs = {
@@ -28,7 +46,8 @@ export default function CRUD({ entity }) {
           { key: 'Salary', label: 'Salary', type: 'number', required: true },
           { key: 'Hire_date', label: 'Hire Date', type: 'date', required: true }
         ],
-        api: '/employees'
+        api: '/employees',
+        searchable: true
       },
       departments: {
         title: 'Departments',
@@ -38,7 +57,8 @@ export default function CRUD({ entity }) {
           { key: 'Dept_name', label: 'Department Name', type: 'text', required: true },
           { key: 'Budget', label: 'Budget', type: 'number', required: true }
         ],
-        api: '/departments'
+        api: '/departments',
+        searchable: true
       },
       factories: {
         title: 'Factories',
@@ -50,7 +70,8 @@ export default function CRUD({ entity }) {
           { key: 'Ph_no', label: 'Phone Number', type: 'tel', required: true },
           { key: 'Manager_name', label: 'Manager Name', type: 'text', required: true }
         ],
-        api: '/factories'
+        api: '/factories',
+        searchable: true
       },
       machines: {
         title: 'Machines',
@@ -63,7 +84,8 @@ export default function CRUD({ entity }) {
           { key: 'Purchase_date', label: 'Purchase Date', type: 'date', required: true },
           { key: 'Status', label: 'Status', type: 'text', required: true }
         ],
-        api: '/machines'
+        api: '/machines',
+        searchable: true
       },
       products: {
         title: 'Products',
@@ -74,7 +96,8 @@ export default function CRUD({ entity }) {
           { key: 'Category', label: 'Category', type: 'text', required: true },
           { key: 'Unit_price', label: 'Unit Price', type: 'number', required: true }
         ],
-        api: '/products'
+        api: '/products',
+        searchable: true
       },
       orders: {
         title: 'Production Orders',
@@ -96,24 +119,74 @@ export default function CRUD({ entity }) {
   const config = getConfig()
 
   useEffect(() => {
-    fetchData()
+    setSearch('')
   }, [entity])
 
+  useEffect(() => {
+    // Debounce so typing in the search box doesn't fire a request per keystroke
+    const timer = setTimeout(fetchData, search ? 300 : 0)
+    return () => clearTimeout(timer)
+  }, [entity, search])
+
+  useEffect(() => {
+    const refetchSoon = () => {
+      clearTimeout(refetchTimer.current)
+      refetchTimer.current = setTimeout(fetchData, 500)
+    }
+    const unsubscribe = subscribeChanges((type, event) => {
+      if (type === 'reset') return refetchSoon()
+      if (event.entity !== entity) return
+      // Search results can't be maintained locally, and key-less events mean "something in this table changed"
+      if (event.key === null || (search && event.op !== 'delete')) return refetchSoon()
+      const next = applyChange(dataRef.current, event, config.idField, !nextCursor)
+      if (next === null) return refetchSoon()
+      dataRef.current = next
+      setData(next)
+    })
+    return () => {
+      unsubscribe()
+      clearTimeout(refetchTimer.current)
+    }
+  }, [entity, search, nextCursor])
+
+  const listUrl = (cursor) => {
+    const params = new URLSearchParams({ limit: PAGE_SIZE })
+    if (search && config.searchable) params.set('q', search)
+    if (cursor) params.set('after', cursor)
+    return `${config.api}?${params.toString()}`
+  }
+
   const fetchData = async () => {
     setLoading(true)
     setError(null)
     try {
-      const response = await apiCall(config.api, { method: 'GET' })
+      const response = await apiCall(listUrl(), { method: 'GET' })
       console.log(`Fetched ${entity}:`, response)
-      setData(Array.isArray(response) ? response : [])
+      setData(Array.isArray(response?.data) ? response.data : [])
+      setNextCursor(response?.next_cursor || null)
     } catch (error) {
       console.error(`Error fetching ${entity}:`, error)
       setError(`Failed to load ${config.title.toLowerCase()}`)
       setData([])
+      setNextCursor(null)
     }
     setLoading(false)
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const response = await apiCall(listUrl(nextCursor), { method: 'GET' })
+      setData(prev => prev.concat(Array.isArray(response?.data) ? response.data : []))
+      setNextCursor(response?.next_cursor || null)
+    } catch (error) {
+      console.error(`Error fetching more ${entity}:`, error)
+      setError(`Failed to load more ${config.title.toLowerCase()}`)
+    }
+    setLoadingMore(false)
+  }
+
   const handleModalSave = async (data) => {
     try {
       // Preprocess date fields to ensure YYYY-MM-DD format
@@ -129,11 +202,18 @@ export default function CRUD({ entity }) {
         }
       })
       if (editingId) {
-        await apiCall(`${config.api}/${editingId}`, {
-          method: 'PUT',
-          body: JSON.stringify(processed),
-          headers: { 'Content-Type': 'application/json' }
+        // Send only the fields that changed so untouched columns are left alone
+        const changed = {}
+        config.fields.forEach(f => {
+          if (f.key !== config.idField && processed[f.key] !== formData[f.key]) changed[f.key] = processed[f.key]
         })
+        if (Object.keys(changed).length > 0) {
+          await apiCall(`${config.api}/${editingId}`, {
+            method: 'PATCH',
+            body: JSON.stringify(changed),
+            headers: { 'Content-Type': 'application/json' }
+          })
+        }
         setSuccess(`${config.title.slice(0, -1)} updated successfully`)
       } else {
         await apiCall(config.api, {
@@ -147,7 +227,8 @@ export default function CRUD({ entity }) {
       setEditingId(null)
       setShowModal(false)
       setTimeout(() => setSuccess(null), 3000)
-      fetchData()
+      // With the change feed connected the saved row arrives as an event
+      if (!changeFeedConnected()) fetchData()
     } catch (error) {
       console.error('Error saving:', error)
       const msg = (typeof error === 'string' ? error : (error?.message || error?.error)) || `Failed to save ${config.title.toLowerCase()}`
@@ -167,7 +248,7 @@ export default function CRUD({ entity }) {
         await apiCall(`${config.api}/${id}`, { method: 'DELETE' })
         setSuccess(`${config.title.slice(0, -1)} deleted successfully`)
         setTimeout(() => setSuccess(null), 3000)
-        fetchData()
+        if (!changeFeedConnected()) fetchData()
       } catch (error) {
         console.error('Error deleting:', error)
         setError(`Failed to delete ${config.title.toLowerCase()}`)
@@ -190,10 +271,21 @@ export default function CRUD({ entity }) {
           <h1>{config.title}</h1>
           <p className="crud-subtitle">Manage {config.title.toLowerCase()}</p>
         </div>
-        <button className="btn-primary" onClick={openAddModal} title={`Add new ${config.title.slice(0, -1)}`}>
-          <Plus size={16} />
-          Add {config.title.slice(0, -1)}
-        </button>
+        <div className="crud-actions">
+          {config.searchable && (
+            <input
+              className="crud-search"
+              type="search"
+              placeholder={`Search ${config.title.toLowerCase()}...`}
+              value={search}
+              onChange={e => setSearch(e.target.value)}
+            />
+          )}
+          <button className="btn-primary" onClick={openAddModal} title={`Add new ${config.title.slice(0, -1)}`}>
+            <Plus size={16} />
+            Add {config.title.slice(0, -1)}
+          </button>
+        </div>
       </div>
 
       {error && (
@@ -269,6 +361,13 @@ export default function CRUD({ entity }) {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="load-more">
+              <button className="btn-primary" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
 
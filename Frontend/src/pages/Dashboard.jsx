@@ -1,8 +1,11 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Users, Building2, Factory, Cog, Package, Clipboard } from 'lucide-react'
-import { api } from '../api'
+import { api, subscribeChanges, changeFeedConnected } from '../api'
 import './Dashboard.css'
 
+// Slow polling fallback while the change feed is disabled, full or reconnecting
+const FALLBACK_REFRESH_MS = 30000
+
 export default function Dashboard() {
   const [stats, setStats] = useState({
     employees: 0,
@@ -13,38 +16,32 @@ export default function Dashboard() {
     orders: 0
   })
   const [loading, setLoading] = useState(true)
+  const [updatedAt, setUpdatedAt] = useState(new Date())
+  const refreshTimer = useRef(null)
 
   useEffect(() => {
     loadStats()
-    const interval = setInterval(loadStats, 30000) // Refresh every 30 seconds
-    return () => clearInterval(interval)
+    // Counts are refreshed when the change feed reports a write; polling only covers a missing feed
+    const unsubscribe = subscribeChanges(() => {
+      clearTimeout(refreshTimer.current)
+      refreshTimer.current = setTimeout(() => loadStats(false), 1000)
+    })
+    const fallback = setInterval(() => {
+      if (!changeFeedConnected()) loadStats(false)
+    }, FALLBACK_REFRESH_MS)
+    return () => {
+      unsubscribe()
+      clearTimeout(refreshTimer.current)
+      clearInterval(fallback)
+    }
   }, [])
 
-  const loadStats = async () => {
-    setLoading(true)
+  const loadStats = async (showLoading = true) => {
+    if (showLoading) setLoading(true)
     try {
-      const entities = [
-        { key: 'employees', endpoint: '/employees' },
-        { key: 'departments', endpoint: '/departments' },
-        { key: 'factories', endpoint: '/factories' },
-        { key: 'machines', endpoint: '/machines' },
-        { key: 'products', endpoint: '/products' },
-        { key: 'orders', endpoint: '/orders' }
-      ]
-
-      const results = await Promise.all(
-        entities.map(entity =>
-          api.get(entity.endpoint)
-            .then(data => ({ key: entity.key, count: Array.isArray(data) ? data.length : 0 }))
-            .catch(() => ({ key: entity.key, count: 0 }))
-        )
-      )
-
-      const newStats = {}
-      results.forEach(result => {
-        newStats[result.key] = result.count
-      })
-      setStats(newStats)
+      const data = await api.get('/stats')
+      setStats(prev => ({ ...prev, ...(data?.counts || {}) }))
+      setUpdatedAt(new Date())
     } catch (error) {
       console.error('Error loading stats:', error)
     } finally {
@@ -106,7 +103,7 @@ export default function Dashboard() {
         </div>
         <button 
           className="refresh-btn"
-          onClick={loadStats}
+          onClick={() => loadStats()}
           disabled={loading}
           title="Refresh statistics"
         >
@@ -142,7 +139,7 @@ export default function Dashboard() {
         <div className="info-card">
           <h3>📊 Quick Stats</h3>
           <p>Total Entities: {Object.values(stats).reduce((a, b) => a + b, 0)}</p>
-          <p>Last Updated: {new Date().toLocaleTimeString()}</p>
+          <p>Last Updated: {updatedAt.toLocaleTimeString()}</p>
         </div>
       </div>
     </div>
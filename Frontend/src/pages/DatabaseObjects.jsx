@@ -1,8 +1,11 @@
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { Database, Play, Copy, CheckCircle, AlertCircle } from 'lucide-react'
 import '../pages/DatabaseObjects.css'
 import { apiCall } from '../api'
 
+// Give up on a background job after this many one-second polls
+const JOB_POLL_ATTEMPTS = 300
+
 export default function DatabaseObjects() {
   const [activeTab, setActiveTab] = useState('triggers')
   const [selectedItem, setSelectedItem] = useState(null)
@@ -10,6 +13,12 @@ export default function DatabaseObjects() {
   const [loading, setLoading] = useState(false)
   const [copied, setCopied] = useState(false)
   const [message, setMessage] = useState(null)
+  const mounted = useRef(true)
+
+  useEffect(() => {
+    mounted.current = true
+    return () => { mounted.current = false }
+  }, [])
 
   const triggers = [
     {
@@ -185,14 +194,31 @@ DELIMITER ;`,
     setLoading(false)
   }
 
+  const waitForJob = async (jobId) => {
+    // Long-running procedures execute as background jobs; poll until they finish, the page
+    // is left (null) or the attempts run out
+    for (let attempt = 0; attempt < JOB_POLL_ATTEMPTS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, 1000))
+      if (!mounted.current) return null
+      const job = await apiCall(`/jobs/${jobId}`, { method: 'GET' })
+      if (job.status === 'succeeded') return job.result
+      if (job.status === 'failed') throw new Error(job.error || 'Procedure failed')
+    }
+    throw new Error(`Procedure is still running (job ${jobId}); check back later`)
+  }
+
   const executeProcedure = async (procedureId, inputs = []) => {
     setLoading(true)
     setMessage(null)
     try {
-      const response = await apiCall('/db-objects/procedures', {
+      let response = await apiCall('/db-objects/procedures', {
         method: 'POST',
-        body: JSON.stringify({ procedureId, inputs })
+        body: JSON.stringify({ procedureId, inputs, async: procedureId === 'update_priority' })
       })
+      if (response.job_id) {
+        response = await waitForJob(response.job_id)
+        if (!mounted.current) return
+      }
       setMessage({
         type: 'success',
         text: response.message || 'Procedure executed successfully'